@@ -1,11 +1,14 @@
 """Module for handling submit requests"""
 
+import asyncio
+import functools
 import logging
-import re
-from dataclasses import dataclass
+import shlex
+import sys
+from dataclasses import dataclass, fields
 from enum import Enum, unique
-from typing import List, Literal, Optional, Union
-from .util import run_cmd
+from typing import Iterable, List, Literal, Optional, Union
+from .util import Package, run_cmd
 
 
 @unique
@@ -23,11 +26,28 @@ class RequestState(Enum):
         return self.value
 
 
+#: lookup table of the request states by their value, which avoids the overhead
+#: of :py:meth:`RequestState.__call__`
+_REQUEST_STATES = {state.value: state for state in RequestState}
+
+
 @dataclass(frozen=True)
 class SubmitRequest:
     """A submission request of a package from a source project to a destination
     project in the Open Build Service."""
 
+    # requests are created in bulk from osc's output, so drop the per-instance
+    # __dict__ by hand (dataclass(slots=True) needs Python 3.10)
+    __slots__ = (
+        "id",
+        "description",
+        "source_project",
+        "source_package",
+        "source_revision",
+        "destination_project",
+        "state",
+    )
+
     #: unique identifier of this SubmitRequest
     id: int
 
@@ -49,11 +69,23 @@ class SubmitRequest:
     #: state of this request
     state: RequestState
 
+    def __reduce__(self):
+        # recreate the request via its constructor, as SubmitRequest is frozen
+        # and slotted pickles would be restored by setting each attribute
+        return (
+            self.__class__,
+            tuple(getattr(self, field.name) for field in fields(self)),
+        )
+
     @staticmethod
+    @functools.lru_cache(maxsize=256)
     def from_osc_output(stdout: str) -> "SubmitRequest":
         """Parse the output of :command:`osc request list $proj` and convert it
         into a :py:class:`SubmitRequest` object.
 
+        The results are cached, so that polling the same requests repeatedly
+        does not parse them again.
+
 
         Args:
             stdout: standard output from :command:`osc request list $proj`
@@ -66,88 +98,108 @@ class SubmitRequest:
         """
 
         lines = stdout.strip().splitlines()
-        tmp = lines[0].split()
-        id = int(tmp[0])
+        # only the request id and the state are needed from the header line
+        id_str, state_field, _ = lines[0].split(None, 2)
+        id = int(id_str)
         # osc sometimes prints partially approved reviews as follows:
         # state: review(approved)
         # => if that happens, just take the first part, as the SR is still in
         # review
-        state_str = tmp[1].split(":")[1]
-        if match_res := re.match(r"^(?P<state>\S+)\(\S+\)$", state_str):
-            state_str = match_res.group("state")
-        state = RequestState(state_str)
+        state_str = state_field.partition(":")[2]
+        if (paren := state_str.find("(")) != -1:
+            state_str = state_str[:paren]
+        # fall back to the constructor for unknown states, as it raises a
+        # descriptive ValueError
+        state = _REQUEST_STATES.get(state_str) or RequestState(state_str)
 
         # osc changed its output around 1.0.0~b4 so that the submit: line is now
         # in the 3rd line and the second is "Creade by: $user"
         submit_idx = 1
-        if lines[1].split()[0] == "Created":
+        if lines[1].lstrip().startswith("Created"):
             submit_idx = 2
-        submit, full_src, arrow, dest = lines[submit_idx].split()
-        assert submit == "submit:" and arrow == "->", "malformed request output"
+        submit, full_src, arrow, dest = lines[submit_idx].split(None, 3)
+        dest = dest.rstrip()
+        assert (
+            submit == "submit:" and arrow == "->" and " " not in dest
+        ), "malformed request output"
 
         # grabbing the description is a bit ugly, because it can span multiple lines:
         #        Descr: ð: sync package with openSUSE.org:devel:BCI:SLE-15-SP4 from
         #               OBS
         #
         # we proceed as follows:
-        # - calculate the number of leading spaces from the second line via a regex
+        # - calculate the number of leading spaces of the submit: line
         # - iterate over all lines until the first non-whitespace string is Descr:
         # - save everything after 'Descr:' into description and set a flag that
         #   the description field has been seen
         # - if the description field was seen and the line has indent +
         #   len("Descr:") leading whitespaces, then it is a continuation of the
         #   description and we append it. if not, then we quit.
-        match = re.match(r"(?P<indent>^\s+)", lines[submit_idx])
-        assert match
-        indent = match.group("indent")
+        submit_line = lines[submit_idx]
+        indent = " " * (len(submit_line) - len(submit_line.lstrip()))
+        assert indent
 
-        description: Optional[str] = None
+        continuation_prefix = indent + " " * len("Descr: ")
+
+        # None until the Descr: line has been found
+        desc_parts: Optional[List[str]] = None
         description_started = False
         for line in lines[submit_idx + 1 :]:
-            tmp = line.split()
             if description_started:
-                indent_length = len(indent) + len("Descr: ")
-                is_continued_descr = line[:indent_length] == " " * indent_length
-                if is_continued_descr:
-                    assert description
-                    description += " " + line.lstrip()
+                if line.startswith(continuation_prefix):
+                    assert desc_parts is not None
+                    desc_parts.append(line.lstrip())
                     continue
                 else:
                     description_started = False
                     break
 
-            if tmp[0] != "Descr:":
+            stripped = line.lstrip()
+            if not stripped.startswith("Descr:"):
                 continue
 
             description_started = True
-            description = " ".join(tmp[1:])
+            # collapse runs of whitespace and skip an empty first line
+            first_line = " ".join(stripped[len("Descr:") :].split())
+            desc_parts = [first_line] if first_line else []
+
+        description = " ".join(desc_parts) if desc_parts is not None else None
 
-        src, rev = full_src.split("@")
-        prj, pkg = src.split("/")
+        src, rev = full_src.split("@", 1)
+        prj, pkg = src.split("/", 1)
+        # the same projects & packages appear in most requests => share them
         return SubmitRequest(
-            id=int(id),
+            id=id,
             state=state,
-            destination_project=dest,
-            source_project=prj,
-            source_package=pkg,
+            destination_project=sys.intern(dest),
+            source_project=sys.intern(prj),
+            source_package=sys.intern(pkg),
             source_revision=rev,
             description=description,
         )
 
 
-def _submit_requests_from_osc(stdout: str) -> List[SubmitRequest]:
-    if "No results for package" in stdout or "does not exist" in stdout:
-        return []
+#: the request states that :py:func:`fetch_submitrequests` searches for by default
+_DEFAULT_STATES = ",".join(
+    state.value
+    for state in (RequestState.NEW, RequestState.REVIEW, RequestState.DECLINED)
+)
 
-    res: List[SubmitRequest] = []
-    for chunk in stdout.split(
-        """
 
-"""
+def _submit_requests_from_osc(stdout: str) -> List[SubmitRequest]:
+    # osc prints the sentinel at the start of its (possibly unstripped) output
+    if (
+        stdout.lstrip().startswith("No results for package")
+        or "does not exist" in stdout
     ):
-        res.append(SubmitRequest.from_osc_output(chunk))
+        return []
 
-    return res
+    # requests are separated by (at least) one blank line
+    return [
+        SubmitRequest.from_osc_output(chunk)
+        for chunk in stdout.split("\n\n")
+        if chunk and not chunk.isspace()
+    ]
 
 
 async def fetch_submitrequests(
@@ -159,11 +211,18 @@ async def fetch_submitrequests(
 ) -> List[SubmitRequest]:
     """Retrieves the list of submitrequests for the project & package.
 
+    This coroutine does not share any state between invocations, so multiple
+    calls can be safely awaited concurrently via :py:func:`asyncio.gather` (see
+    :py:func:`fetch_submitrequests_many`).
+
     Args:
         project: the source project
         package: the source package
         osc_cli: the command that will be used to invoke
-            :command:`osc`. Defaults to plain :command:`osc`.
+            :command:`osc`. Defaults to plain :command:`osc`. It is split into
+            its arguments via :py:func:`shlex.split` and is not evaluated by a
+            shell, so environment variable assignments and variable expansion
+            are not supported.
         submit_request_states: Optional list of request states that should be
             searched for. If no values are provided, then this defaults to
             :py:attr:`RequestState.NEW`, :py:attr:`RequestState.REVIEW`,
@@ -175,22 +234,64 @@ async def fetch_submitrequests(
         A list of open submit requests with the provided states.
     """
     states: str
-    if submit_request_states is None or isinstance(submit_request_states, list):
-        states = ",".join(
-            str(state)
-            for state in (
-                submit_request_states
-                or [RequestState.NEW, RequestState.REVIEW, RequestState.DECLINED]
-            )
-        )
+    if not submit_request_states:
+        states = _DEFAULT_STATES
+    elif isinstance(submit_request_states, list):
+        states = ",".join(state.value for state in submit_request_states)
     else:
         states = submit_request_states
 
     return _submit_requests_from_osc(
         (
             await run_cmd(
-                f"{osc_cli} request list -s {states} -t submit {project}/{package}",
+                [
+                    *shlex.split(osc_cli),
+                    "request",
+                    "list",
+                    "-s",
+                    states,
+                    "-t",
+                    "submit",
+                    f"{project}/{package}",
+                ],
                 logger=logger,
             )
-        ).stdout.strip()
+        ).stdout
+    )
+
+
+async def fetch_submitrequests_many(
+    packages: Iterable[Package],
+    osc_cli: str = "osc",
+    submit_request_states: Optional[Union[List[RequestState], Literal["all"]]] = None,
+    logger: Optional[logging.Logger] = None,
+) -> List[List[SubmitRequest]]:
+    """Retrieves the submitrequests of multiple packages concurrently.
+
+    Args:
+        packages: the source packages whose submitrequests should be fetched
+        osc_cli: the command that will be used to invoke
+            :command:`osc`, see :py:func:`fetch_submitrequests`
+        submit_request_states: Optional list of request states that should be
+            searched for, see :py:func:`fetch_submitrequests`
+        logger: an optional logger for debug logging of the calls to
+            :command:`osc`
+
+    Returns:
+        A list containing the open submit requests of each package in the same
+        order as ``packages``.
+    """
+    return list(
+        await asyncio.gather(
+            *(
+                fetch_submitrequests(
+                    pkg.project,
+                    pkg.package,
+                    osc_cli=osc_cli,
+                    submit_request_states=submit_request_states,
+                    logger=logger,
+                )
+                for pkg in packages
+            )
+        )
     )
@@ -3,23 +3,10 @@ from datetime import timedelta
 from typing import List, Optional
 import aiofiles.tempfile
 import logging
+import shlex
 from dataclasses import dataclass
 
-from obs_package_update.util import run_cmd
-
-
-@dataclass
-class Package:
-    """Representation of a package in the Open Build Service."""
-
-    #: the project name to which the package belongs
-    project: str
-
-    #: the package's name
-    package: str
-
-    def __str__(self) -> str:
-        return f"{self.project}/{self.package}"
+from obs_package_update.util import Package, RunCommand
 
 
 @dataclass
@@ -43,7 +30,11 @@ class Updater(ABC):
     logger: Optional[logging.Logger] = None
 
     #: The osc command that will be used to execute the update. It defaults to
-    #: :command:`osc -A $api_url` unless a value is provided
+    #: :command:`osc -A $api_url` unless a value is provided.
+    #: The command is split into its arguments via :py:func:`shlex.split` and
+    #: is **not** evaluated by a shell, so environment variable assignments
+    #: (``OSC_CONFIG=~/x osc``), variable expansion (``osc -A $API``) or ``~``
+    #: are not supported.
     osc_cli: Optional[str] = None
 
     def __post_init__(self):
@@ -101,57 +92,63 @@ class Updater(ABC):
             self.osc_cli
         ), f"{self.osc_cli=} must be defined, was __post_init__ not run?"
 
+        osc = shlex.split(self.osc_cli)
+
         async with aiofiles.tempfile.TemporaryDirectory() as tmp:
             if self.logger:
                 self.logger.info("Updating %s", source_package)
                 self.logger.debug("Running update in %s", tmp)
 
-            async def run(cmd: str) -> str:
-                res = await run_cmd(
-                    cmd,
-                    cwd=tmp,
-                    raise_on_error=True,
-                    timeout=timedelta(minutes=1),
-                    logger=self.logger,
-                )
-                return res.stdout
+            run = RunCommand(
+                cwd=tmp,
+                raise_on_error=True,
+                timeout=timedelta(minutes=1),
+                logger=self.logger,
+            )
 
             target_pkg: Optional[str] = None
             try:
-                cmd = f"{self.osc_cli} branch {source_package.project} {source_package.package}"
+                cmd = [*osc, "branch", source_package.project, source_package.package]
                 if target_project:
-                    cmd += f" {target_project}"
+                    cmd.append(target_project)
 
-                stdout = (await run(cmd)).split("\n")
-                co_cmd = stdout[2]
-                target_pkg = co_cmd.split(" ")[-1]
+                # the 3rd line of the output is the checkout command:
+                # osc co $proj/$pkg
+                co_cmd = (await run(cmd)).stdout.split("\n", 3)[2]
+                target_pkg = co_cmd.rsplit(" ", 1)[-1]
+                target_prj, target_pkg_name = target_pkg.split("/", 1)
 
-                await run(f"{self.osc_cli} co {target_pkg} -o {tmp}")
+                await run([*osc, "co", target_pkg, "-o", tmp], decode=False)
 
                 written_files = await self.add_files(tmp)
-                for fname in written_files:
-                    await run(f"{self.osc_cli} add {fname}")
+                if written_files:
+                    await run([*osc, "add", *written_files])
 
-                st_out = await run(f"{self.osc_cli} st")
+                st_out = (await run([*osc, "st"], decode=False)).stdout
                 # nothing changed => leave
-                if st_out == "":
+                if not st_out:
                     if self.logger:
                         self.logger.info("Nothing changed => no update available")
                     if cleanup_on_no_change:
                         await run(
-                            f"{self.osc_cli} rdelete {target_pkg} -m 'cleanup as nothing changed'"
+                            [
+                                *osc,
+                                "rdelete",
+                                target_pkg,
+                                "-m",
+                                "cleanup as nothing changed",
+                            ]
                         )
                     return
 
-                for cmd in ["vc", "ci"]:
-                    await run(f'{self.osc_cli} {cmd} -m "{commit_msg}"')
+                for subcmd in ["vc", "ci"]:
+                    await run([*osc, subcmd, "-m", commit_msg])
 
                 # wait for any services to run before doing anything else
-                # target_pkg is $proj/$pkg => convert to `osc service wait $proj $pkg`
-                await run(f"{self.osc_cli} service wait {target_pkg.replace('/', ' ')}")
+                await run([*osc, "service", "wait", target_prj, target_pkg_name])
 
                 if submit_package:
-                    await run(f'{self.osc_cli} sr --cleanup -m "{commit_msg}"')
+                    await run([*osc, "sr", "--cleanup", "-m", commit_msg])
 
             except Exception as exc:
                 if self.logger:
@@ -161,7 +158,5 @@ class Updater(ABC):
                 if cleanup_on_error and target_pkg:
                     if self.logger:
                         self.logger.info("Will cleanup %s", target_pkg)
-                    await run(
-                        f"{self.osc_cli} rdelete {target_pkg} -m 'cleanup on error'"
-                    )
+                    await run([*osc, "rdelete", target_pkg, "-m", "cleanup on error"])
                 raise exc
@@ -1,32 +1,75 @@
 import asyncio
 import logging
-from typing import Any, Callable, Coroutine, Optional, TypeVar, Union
+import os
+import shlex
+import signal
+from typing import (
+    Any,
+    AnyStr,
+    Callable,
+    Coroutine,
+    Generic,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+    overload,
+)
 from datetime import timedelta
 
 from dataclasses import dataclass
 
 
 @dataclass
-class CommandResult:
+class Package:
+    """Representation of a package in the Open Build Service."""
+
+    #: the project name to which the package belongs
+    project: str
+
+    #: the package's name
+    package: str
+
+    def __str__(self) -> str:
+        return f"{self.project}/{self.package}"
+
+
+@dataclass(frozen=True)
+class CommandResult(Generic[AnyStr]):
     """The result of an executed command.
 
+    The standard output and error are decoded strings, unless
+    :py:func:`run_cmd` was invoked with ``decode=False``, in which case they are
+    the raw ``bytes``.
+
     This class also works like an iterator:
 
     >>> retcode, stdout, stderr = CommandResult(1, "foo", "err")
 
     """
 
+    # dataclass(slots=True) requires Python 3.10
+    __slots__ = ("exit_code", "stdout", "stderr")
+
     #: the exit code
     exit_code: int
 
-    #: decoded standard output
-    stdout: str
+    #: standard output
+    stdout: AnyStr
 
-    #: decoded standard error
-    stderr: str
+    #: standard error
+    stderr: AnyStr
 
     def __iter__(self):
-        return (self.exit_code, self.stdout, self.stderr).__iter__()
+        return iter((self.exit_code, self.stdout, self.stderr))
+
+    def __reduce__(self):
+        # the default pickle state of slotted classes is restored via
+        # __setattr__, which is forbidden for frozen dataclasses
+        return (self.__class__, (self.exit_code, self.stdout, self.stderr))
 
 
 class CommandError(RuntimeError):
@@ -37,7 +80,7 @@ class CommandError(RuntimeError):
 
     """
 
-    def __init__(self, command_result: CommandResult, *args, **kwargs) -> None:
+    def __init__(self, command_result: CommandResult[Any], *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
 
         assert (
@@ -45,21 +88,58 @@ class CommandError(RuntimeError):
         ), f"The command must have failed but it has exit code {command_result.exit_code}."
 
         #: The result of the failed command
-        self.command_result: CommandResult = command_result
+        self.command_result: CommandResult[Any] = command_result
+
 
+#: A command that can be executed by :py:func:`run_cmd`: either a string that
+#: is run by the shell or a list of arguments that is executed directly
+Command = Union[str, List[str]]
 
+
+@overload
 async def run_cmd(
-    cmd: str,
+    cmd: Command,
     cwd: Optional[str] = None,
     raise_on_error: bool = True,
     timeout: Optional[Union[int, float, timedelta]] = None,
     logger: Optional[logging.Logger] = None,
     env: Optional[dict[str, str]] = None,
-) -> CommandResult:
+    *,
+    decode: Literal[True] = True,
+    new_session: bool = False,
+) -> CommandResult[str]: ...
+
+
+@overload
+async def run_cmd(
+    cmd: Command,
+    cwd: Optional[str] = None,
+    raise_on_error: bool = True,
+    timeout: Optional[Union[int, float, timedelta]] = None,
+    logger: Optional[logging.Logger] = None,
+    env: Optional[dict[str, str]] = None,
+    *,
+    decode: Literal[False],
+    new_session: bool = False,
+) -> CommandResult[bytes]: ...
+
+
+async def run_cmd(
+    cmd: Command,
+    cwd: Optional[str] = None,
+    raise_on_error: bool = True,
+    timeout: Optional[Union[int, float, timedelta]] = None,
+    logger: Optional[logging.Logger] = None,
+    env: Optional[dict[str, str]] = None,
+    *,
+    decode: bool = True,
+    new_session: bool = False,
+) -> Union[CommandResult[str], CommandResult[bytes]]:
     """Simple asynchronous shell command execution.
 
     Args:
-        cmd: The shell command to run
+        cmd: The command to run. A string is passed to the shell, whereas a
+            list of arguments is executed directly without spawning a shell.
         cwd: the working directory where the shell command is executed (defaults to
             the current working directory)
         raise_on_err: raises a :py:class:`CommandError` if the shell command
@@ -71,6 +151,19 @@ async def run_cmd(
         env: an optional environment dictionary that is set as the environment
             for the shell command. If not provided, then the environment of the
             current process is inherited
+        decode: whether the standard output and error should be decoded
+            (default). If ``False``, then they are stored as ``bytes`` in the
+            returned :py:class:`CommandResult`, which avoids decoding large
+            outputs that are only checked for emptiness.
+        new_session: whether to start the command in a new session (see
+            :manpage:`setsid(2)`), so that it is killed together with all its
+            children on timeout or when the awaiting task is cancelled.
+            Otherwise only the process itself is killed and children of a
+            shell that keep its output open delay the return until they
+            exit. The new session has no controlling terminal, so the command
+            cannot prompt via :file:`/dev/tty` (e.g. for the password of
+            :command:`osc`) and does not receive :kbd:`Ctrl-C`. Defaults to
+            ``False``.
 
     Raises:
         :py:class:`CommandError`: on failure and if ``raise_on_err`` is ``True``
@@ -78,32 +171,73 @@ async def run_cmd(
     Returns:
         A :py:class:`CommandResult` containing the information about the finished process.
     """
+    cmd_str = cmd if isinstance(cmd, str) else shlex.join(cmd)
     if logger:
-        logger.debug("running command %s", cmd)
-
-    proc = await asyncio.subprocess.create_subprocess_shell(
-        cmd,
-        stderr=asyncio.subprocess.PIPE,
-        stdout=asyncio.subprocess.PIPE,
-        cwd=cwd,
-        env=env,
-    )
+        logger.debug("running command %s", cmd_str)
+
+    if isinstance(cmd, str):
+        proc = await asyncio.subprocess.create_subprocess_shell(
+            cmd,
+            stderr=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            cwd=cwd,
+            env=env,
+            start_new_session=new_session,
+        )
+    else:
+        proc = await asyncio.subprocess.create_subprocess_exec(
+            *cmd,
+            stderr=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            cwd=cwd,
+            env=env,
+            start_new_session=new_session,
+        )
     if isinstance(timeout, timedelta):
         timeout = timeout.total_seconds()
 
-    retcode = await asyncio.wait_for(proc.wait(), timeout=timeout)
-    stdout, stderr = await proc.communicate()
-    out = stdout.decode()
-    err = stderr.decode()
-    command_res = CommandResult(exit_code=retcode, stdout=out, stderr=err)
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+    except (asyncio.TimeoutError, asyncio.CancelledError):
+        try:
+            if new_session:
+                # the command is the leader of its own process group
+                os.killpg(proc.pid, signal.SIGKILL)
+            else:
+                proc.kill()
+        except ProcessLookupError:
+            # the process (group) is already gone, e.g. because the shell
+            # exited and its remaining children moved to a different session
+            pass
+        await proc.wait()
+        raise
+
+    retcode = proc.returncode
+    assert retcode is not None
+    command_res: Union[CommandResult[str], CommandResult[bytes]]
+    if decode:
+        command_res = CommandResult(
+            exit_code=retcode, stdout=stdout.decode(), stderr=stderr.decode()
+        )
+    else:
+        command_res = CommandResult(exit_code=retcode, stdout=stdout, stderr=stderr)
+
     if logger:
         logger.debug(
-            "command terminated with %d, stdout: %s, stderr: %s", retcode, out, err
+            "command terminated with %d, stdout: %s, stderr: %s",
+            retcode,
+            command_res.stdout,
+            command_res.stderr,
         )
     if raise_on_error and retcode != 0:
+        if isinstance(command_res.stdout, str):
+            out, err = command_res.stdout, command_res.stderr
+        else:
+            out = stdout.decode(errors="replace")
+            err = stderr.decode(errors="replace")
         raise CommandError(
             command_res,
-            f"Command {cmd} failed (exit code {retcode}) with stdout: '{out}', stderr: '{err}'",
+            f"Command {cmd_str} failed (exit code {retcode}) with stdout: '{out}', stderr: '{err}'",
         )
 
     return command_res
@@ -114,45 +248,96 @@ class RunCommand:
     """Helper class to run commands asynchronously via :py:func:`run_cmd` with a
     common set of parameters.
 
+    Parameters passed to the call override the ones stored in the instance.
+
     """
 
+    #: the default working directory of the commands
     cwd: Optional[str] = None
+
+    #: whether to raise a :py:class:`CommandError` if a command fails
     raise_on_error: bool = True
+
+    #: the default timeout of the commands
     timeout: Optional[Union[int, float, timedelta]] = None
+
+    #: an optional logger for debug logging
     logger: Optional[logging.Logger] = None
+
+    #: The environment of the commands. It is passed through to the child
+    #: process as is and an environment passed to the call replaces it
+    #: completely (it is not merged). If neither is set, then the environment of
+    #: the current process is inherited without creating a copy of it.
     env: Optional[dict[str, str]] = None
 
+    @overload
+    async def __call__(
+        self,
+        cmd: Command,
+        cwd: Optional[str] = None,
+        raise_on_error: Optional[bool] = None,
+        timeout: Optional[Union[int, float, timedelta]] = None,
+        logger: Optional[logging.Logger] = None,
+        env: Optional[dict[str, str]] = None,
+        *,
+        decode: Literal[True] = True,
+    ) -> CommandResult[str]: ...
+
+    @overload
     async def __call__(
         self,
-        cmd: str,
+        cmd: Command,
         cwd: Optional[str] = None,
         raise_on_error: Optional[bool] = None,
         timeout: Optional[Union[int, float, timedelta]] = None,
         logger: Optional[logging.Logger] = None,
         env: Optional[dict[str, str]] = None,
-    ) -> CommandResult:
+        *,
+        decode: Literal[False],
+    ) -> CommandResult[bytes]: ...
+
+    async def __call__(
+        self,
+        cmd: Command,
+        cwd: Optional[str] = None,
+        raise_on_error: Optional[bool] = None,
+        timeout: Optional[Union[int, float, timedelta]] = None,
+        logger: Optional[logging.Logger] = None,
+        env: Optional[dict[str, str]] = None,
+        *,
+        decode: bool = True,
+    ) -> Union[CommandResult[str], CommandResult[bytes]]:
         raise_on_err = raise_on_error
         if raise_on_error is None:
             raise_on_err = self.raise_on_error
         assert raise_on_err is not None
-        return await run_cmd(
+        args = (
             cmd,
             cwd or self.cwd,
             raise_on_err,
             timeout or self.timeout,
             logger or self.logger,
-            env or self.env,
+            env if env is not None else self.env,
         )
+        if decode:
+            return await run_cmd(*args)
+        return await run_cmd(*args, decode=False)
 
 
 #: Return type of the coroutine passed to :py:func:`retry_async_run_cmd`
 T = TypeVar("T")
 
+#: Default delays in seconds between the attempts of
+#: :py:func:`retry_async_run_cmd`: starting at 0.1 seconds and doubling after
+#: each failure up to at most 30 seconds
+RETRY_DELAYS: Tuple[float, ...] = tuple(min(0.1 * 2**i, 30) for i in range(10))
+
 
 async def retry_async_run_cmd(
     coroutine: Callable[[], Coroutine[Any, Any, T]],
     retries: int = 10,
     logger: Optional[logging.Logger] = None,
+    delays: Sequence[float] = RETRY_DELAYS,
 ) -> T:
     """Retry the coroutine up to ``retries`` times.
 
@@ -160,21 +345,27 @@ async def retry_async_run_cmd(
         coroutine: An asynchronous that can throw a :py:class:`RuntimeError` on failure
         retries: The number of times the call of ``coroutine`` should be repeated
         logger: An optional logger, that will log all failures at debug level
+        delays: The delays in seconds before the 2nd, 3rd, etc. attempt. The
+            last delay is reused if there are more retries than delays, no
+            delay is made if it is empty. Defaults to :py:data:`RETRY_DELAYS`.
+
+    Raises:
+        :py:class:`ValueError`: if ``retries`` is not positive
 
     Returns:
         The returned value of `coroutine()`
     """
     for i in range(retries):
         try:
-            res = await coroutine()
-            return res
+            return await coroutine()
         except RuntimeError as runtime_err:
             if logger:
                 logger.debug(
                     "async call failed with %s, retry count: %d", runtime_err, i + 1
                 )
-            if i != retries - 1:
-                pass
-            else:
+            if i == retries - 1:
                 raise
-    assert False, "This code must be unreachable"
+            if delays:
+                await asyncio.sleep(delays[min(i, len(delays) - 1)])
+
+    raise ValueError(f"retries must be a positive number, got {retries}")
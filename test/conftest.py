@@ -0,0 +1,169 @@
+"""Shared test data: outputs of :command:`osc request list` containing a
+single request and the
+:py:class:`~obs_package_update.submitrequest.SubmitRequest` that they describe.
+
+Tests receive them via the ``osc_case`` fixture.
+
+"""
+
+from typing import List, Tuple
+import pytest
+from obs_package_update.submitrequest import RequestState, SubmitRequest
+
+OSC_CASES: List[Tuple[str, SubmitRequest]] = [
+    (
+        """274438  State:declined   By:oertel       When:2022-06-17T14:20:09
+        submit:          openSUSE.org:devel:BCI:SLE-15-SP4/ruby-2.5-image@6 -> SUSE:SLE-15-SP4:Update:BCI
+        Review by Group      is accepted:  legal-auto(licensedigger)                         
+        Review by Group      is new:       autobuild-team                                    
+        Review by Group      is accepted:  sle-release-managers(aherzig)                     
+        Descr: sync package with openSUSE.org:devel:BCI:SLE-15-SP4 from OBS
+        Comment: please add some detail to the changes entry about the other
+               changes,,replacing amp/amp by ; in Dockerfile 
+""",
+        SubmitRequest(
+            id=274438,
+            state=RequestState.DECLINED,
+            source_project="openSUSE.org:devel:BCI:SLE-15-SP4",
+            source_package="ruby-2.5-image",
+            source_revision="6",
+            destination_project="SUSE:SLE-15-SP4:Update:BCI",
+            description="sync package with openSUSE.org:devel:BCI:SLE-15-SP4 from OBS",
+        ),
+    ),
+    (
+        """969741  State:revoked    By:dancermak    When:2022-04-13T08:45:53
+        submit:          home:dancermak:auto_update:sp4/ruby-2.5-image@2 -> devel:BCI:SLE-15-SP4
+        Descr: Update to the latest generator version
+        Comment: The source project 'home:dancermak:auto_update:sp4' has been
+               removed 
+""",
+        SubmitRequest(
+            id=969741,
+            state=RequestState.REVOKED,
+            source_project="home:dancermak:auto_update:sp4",
+            source_package="ruby-2.5-image",
+            source_revision="2",
+            destination_project="devel:BCI:SLE-15-SP4",
+            description="Update to the latest generator version",
+        ),
+    ),
+    (
+        """972062  State:accepted   By:dirkmueller  When:2022-04-22T09:00:20
+        submit:          home:dancermak:auto_update:sp4/ruby-2.5-image@2 -> devel:BCI:SLE-15-SP4
+        Descr: remove org.opencontainers.image.revision label
+""",
+        SubmitRequest(
+            id=972062,
+            state=RequestState.ACCEPTED,
+            source_project="home:dancermak:auto_update:sp4",
+            source_package="ruby-2.5-image",
+            source_revision="2",
+            destination_project="devel:BCI:SLE-15-SP4",
+            description="remove org.opencontainers.image.revision label",
+        ),
+    ),
+    (
+        """264309  State:revoked    By:dancermak    When:2022-02-08T14:45:10
+        submit:          home:dancermak:auto_update:sp4/ruby-2.5-image@2 -> SUSE:SLE-15-SP4:Update:BCI
+        Review by Group      is accepted:  legal-auto(licensedigger)                         
+        Review by Group      is accepted:  autobuild-team(bigironman)                        
+        Review by Group      is new:       sle-release-managers                              
+        Descr: Update labels according to jsc#BCI-33
+        Comment: The source project 'home:dancermak:auto_update:sp4' has been
+               removed 
+""",
+        SubmitRequest(
+            id=264309,
+            state=RequestState.REVOKED,
+            source_project="home:dancermak:auto_update:sp4",
+            source_package="ruby-2.5-image",
+            source_revision="2",
+            destination_project="SUSE:SLE-15-SP4:Update:BCI",
+            description="Update labels according to jsc#BCI-33",
+        ),
+    ),
+    (
+        """275743  State:new        By:bigironman   When:2022-07-15T09:34:59
+        submit:          openSUSE.org:devel:BCI:SLE-15-SP4/rust-1.60-image@6 -> SUSE:SLE-15-SP4:Update:BCI
+        Review by Group      is accepted:  legal-auto(licensedigger)                         
+        Review by Group      is accepted:  autobuild-team(bigironman)                        
+        Review by Group      is accepted:  sle-release-managers(aherzig)                     
+        Descr: ð: sync package with openSUSE.org:devel:BCI:SLE-15-SP4 from
+               OBS
+        Comment: All reviewers accepted request 
+""",
+        SubmitRequest(
+            id=275743,
+            state=RequestState.NEW,
+            source_project="openSUSE.org:devel:BCI:SLE-15-SP4",
+            source_package="rust-1.60-image",
+            source_revision="6",
+            destination_project="SUSE:SLE-15-SP4:Update:BCI",
+            description="ð: sync package with openSUSE.org:devel:BCI:SLE-15-SP4 from OBS",
+        ),
+    ),
+    (
+        """285603  State:review(approved) By:dancermak    When:2022-12-01T12:46:57
+        submit:          openSUSE.org:devel:BCI:SLE-15-SP5/389-ds-container@2 -> SUSE:SLE-15-SP5:Update:BCI
+        Review by Group      is accepted:  legal-auto(licensedigger)                         
+        Review by Group      is accepted:  autobuild-team(dmach)                             
+        Review by Group      is new:       sle-release-managers                              
+        Descr: 🤖: sync package with openSUSE.org:devel:BCI:SLE-15-SP5 from OBS
+""",
+        SubmitRequest(
+            id=285603,
+            state=RequestState.REVIEW,
+            source_project="openSUSE.org:devel:BCI:SLE-15-SP5",
+            source_package="389-ds-container",
+            description="🤖: sync package with openSUSE.org:devel:BCI:SLE-15-SP5 from OBS",
+            source_revision="2",
+            destination_project="SUSE:SLE-15-SP5:Update:BCI",
+        ),
+    ),
+    (
+        """289123  State:review     By:dancermak    When:2023-01-30T08:01:32
+        Created by: dancermak
+        submit:          openSUSE.org:devel:BCI:SLE-15-SP4/rmt-helm@4 ->    SUSE:SLE-15-SP4:Update:BCI
+        Review by Group      is accepted:  legal-auto(licensedigger)                         
+        Review by Group      is accepted:  autobuild-team(bigironman)                        
+        Review by Group      is new:       sle-release-managers                              
+        Descr: 🤖: sync package with openSUSE.org:devel:BCI:SLE-15-SP4 from OBS
+""",
+        SubmitRequest(
+            id=289123,
+            state=RequestState.REVIEW,
+            source_package="rmt-helm",
+            source_project="openSUSE.org:devel:BCI:SLE-15-SP4",
+            description="🤖: sync package with openSUSE.org:devel:BCI:SLE-15-SP4 from OBS",
+            source_revision="4",
+            destination_project="SUSE:SLE-15-SP4:Update:BCI",
+        ),
+    ),
+    (
+        """310990  State:review(approved) By:dirkmueller  When:2023-10-20T13:11:58
+        Created by: dirkmueller
+        submit:          home:dirkmueller:branches:SUSE:SLE-15-SP5:Update:BCI/rmt-helm@5 -> SUSE:SLE-15-SP5:Update:BCI
+        Review by Group      is accepted:  legal-auto(licensedigger)                         
+        Review by Group      is accepted:  autobuild-team(darix)                             
+        Review by Group      is new:       sle-release-managers""",
+        SubmitRequest(
+            id=310990,
+            state=RequestState.REVIEW,
+            source_package="rmt-helm",
+            source_project="home:dirkmueller:branches:SUSE:SLE-15-SP5:Update:BCI",
+            description=None,
+            source_revision="5",
+            destination_project="SUSE:SLE-15-SP5:Update:BCI",
+        ),
+    ),
+]
+
+
+@pytest.fixture(params=OSC_CASES, ids=[str(sr.id) for _, sr in OSC_CASES])
+def osc_case(request: pytest.FixtureRequest) -> Tuple[str, SubmitRequest]:
+    """The output of :command:`osc request list` with a single request and the
+    expected :py:class:`~obs_package_update.submitrequest.SubmitRequest`.
+
+    """
+    return request.param
@@ -1,171 +1,93 @@
-from typing import List
+import pickle
+from typing import List, Tuple
 import pytest
+from pytest_mock import MockerFixture
+from obs_package_update import Package
 from obs_package_update.submitrequest import (
     RequestState,
     SubmitRequest,
     _submit_requests_from_osc,
+    fetch_submitrequests,
+    fetch_submitrequests_many,
 )
+from obs_package_update.util import CommandResult
+
+
+def test_from_osc_stdout(osc_case: Tuple[str, SubmitRequest]):
+    stdout, submit_request = osc_case
+    assert submit_request == SubmitRequest.from_osc_output(stdout)
+
+
+def test_pickle():
+    submit_request = SubmitRequest(
+        id=1,
+        state=RequestState.NEW,
+        source_project="home:foo",
+        source_package="bar",
+        source_revision="2",
+        destination_project="devel:foo",
+        description=None,
+    )
+    assert pickle.loads(pickle.dumps(submit_request)) == submit_request
 
 
 @pytest.mark.parametrize(
-    "stdout,submit_request",
+    "descr_lines,description",
     [
-        (
-            """274438  State:declined   By:oertel       When:2022-06-17T14:20:09
-        submit:          openSUSE.org:devel:BCI:SLE-15-SP4/ruby-2.5-image@6 -> SUSE:SLE-15-SP4:Update:BCI
-        Review by Group      is accepted:  legal-auto(licensedigger)                         
-        Review by Group      is new:       autobuild-team                                    
-        Review by Group      is accepted:  sle-release-managers(aherzig)                     
-        Descr: sync package with openSUSE.org:devel:BCI:SLE-15-SP4 from OBS
-        Comment: please add some detail to the changes entry about the other
-               changes,,replacing amp/amp by ; in Dockerfile 
-""",
-            SubmitRequest(
-                id=274438,
-                state=RequestState.DECLINED,
-                source_project="openSUSE.org:devel:BCI:SLE-15-SP4",
-                source_package="ruby-2.5-image",
-                source_revision="6",
-                destination_project="SUSE:SLE-15-SP4:Update:BCI",
-                description="sync package with openSUSE.org:devel:BCI:SLE-15-SP4 from OBS",
-            ),
-        ),
-        (
-            """969741  State:revoked    By:dancermak    When:2022-04-13T08:45:53
-        submit:          home:dancermak:auto_update:sp4/ruby-2.5-image@2 -> devel:BCI:SLE-15-SP4
-        Descr: Update to the latest generator version
-        Comment: The source project 'home:dancermak:auto_update:sp4' has been
-               removed 
-""",
-            SubmitRequest(
-                id=969741,
-                state=RequestState.REVOKED,
-                source_project="home:dancermak:auto_update:sp4",
-                source_package="ruby-2.5-image",
-                source_revision="2",
-                destination_project="devel:BCI:SLE-15-SP4",
-                description="Update to the latest generator version",
-            ),
-        ),
-        (
+        ("        Descr:   foo    bar  \n", "foo bar"),
+        ("        Descr:\n               continued\n", "continued"),
+        ("        Descr:\n", ""),
+    ],
+)
+def test_from_osc_stdout_description_whitespace(descr_lines: str, description: str):
+    assert (
+        SubmitRequest.from_osc_output(
             """972062  State:accepted   By:dirkmueller  When:2022-04-22T09:00:20
         submit:          home:dancermak:auto_update:sp4/ruby-2.5-image@2 -> devel:BCI:SLE-15-SP4
+""" + descr_lines + "        Comment: foo\n"
+        ).description
+        == description
+    )
+
+
+def test_from_osc_stdout_cached():
+    stdout = """972062  State:accepted   By:dirkmueller  When:2022-04-22T09:00:20
+        submit:          home:dancermak:auto_update:sp4/ruby-2.5-image@2 -> devel:BCI:SLE-15-SP4
         Descr: remove org.opencontainers.image.revision label
-""",
-            SubmitRequest(
-                id=972062,
-                state=RequestState.ACCEPTED,
-                source_project="home:dancermak:auto_update:sp4",
-                source_package="ruby-2.5-image",
-                source_revision="2",
-                destination_project="devel:BCI:SLE-15-SP4",
-                description="remove org.opencontainers.image.revision label",
-            ),
-        ),
-        (
-            """264309  State:revoked    By:dancermak    When:2022-02-08T14:45:10
-        submit:          home:dancermak:auto_update:sp4/ruby-2.5-image@2 -> SUSE:SLE-15-SP4:Update:BCI
-        Review by Group      is accepted:  legal-auto(licensedigger)                         
-        Review by Group      is accepted:  autobuild-team(bigironman)                        
-        Review by Group      is new:       sle-release-managers                              
-        Descr: Update labels according to jsc#BCI-33
-        Comment: The source project 'home:dancermak:auto_update:sp4' has been
-               removed 
-""",
-            SubmitRequest(
-                id=264309,
-                state=RequestState.REVOKED,
-                source_project="home:dancermak:auto_update:sp4",
-                source_package="ruby-2.5-image",
-                source_revision="2",
-                destination_project="SUSE:SLE-15-SP4:Update:BCI",
-                description="Update labels according to jsc#BCI-33",
-            ),
-        ),
-        (
-            """275743  State:new        By:bigironman   When:2022-07-15T09:34:59
-        submit:          openSUSE.org:devel:BCI:SLE-15-SP4/rust-1.60-image@6 -> SUSE:SLE-15-SP4:Update:BCI
-        Review by Group      is accepted:  legal-auto(licensedigger)                         
-        Review by Group      is accepted:  autobuild-team(bigironman)                        
-        Review by Group      is accepted:  sle-release-managers(aherzig)                     
-        Descr: ð: sync package with openSUSE.org:devel:BCI:SLE-15-SP4 from
-               OBS
-        Comment: All reviewers accepted request 
-""",
-            SubmitRequest(
-                id=275743,
-                state=RequestState.NEW,
-                source_project="openSUSE.org:devel:BCI:SLE-15-SP4",
-                source_package="rust-1.60-image",
-                source_revision="6",
-                destination_project="SUSE:SLE-15-SP4:Update:BCI",
-                description="ð: sync package with openSUSE.org:devel:BCI:SLE-15-SP4 from OBS",
-            ),
-        ),
-        (
-            """285603  State:review(approved) By:dancermak    When:2022-12-01T12:46:57
-        submit:          openSUSE.org:devel:BCI:SLE-15-SP5/389-ds-container@2 -> SUSE:SLE-15-SP5:Update:BCI
-        Review by Group      is accepted:  legal-auto(licensedigger)                         
-        Review by Group      is accepted:  autobuild-team(dmach)                             
-        Review by Group      is new:       sle-release-managers                              
-        Descr: 🤖: sync package with openSUSE.org:devel:BCI:SLE-15-SP5 from OBS
-""",
-            SubmitRequest(
-                id=285603,
-                state=RequestState.REVIEW,
-                source_project="openSUSE.org:devel:BCI:SLE-15-SP5",
-                source_package="389-ds-container",
-                description="🤖: sync package with openSUSE.org:devel:BCI:SLE-15-SP5 from OBS",
-                source_revision="2",
-                destination_project="SUSE:SLE-15-SP5:Update:BCI",
-            ),
-        ),
-        (
-            """289123  State:review     By:dancermak    When:2023-01-30T08:01:32
-        Created by: dancermak
-        submit:          openSUSE.org:devel:BCI:SLE-15-SP4/rmt-helm@4 ->    SUSE:SLE-15-SP4:Update:BCI
-        Review by Group      is accepted:  legal-auto(licensedigger)                         
-        Review by Group      is accepted:  autobuild-team(bigironman)                        
-        Review by Group      is new:       sle-release-managers                              
-        Descr: 🤖: sync package with openSUSE.org:devel:BCI:SLE-15-SP4 from OBS
-""",
-            SubmitRequest(
-                id=289123,
-                state=RequestState.REVIEW,
-                source_package="rmt-helm",
-                source_project="openSUSE.org:devel:BCI:SLE-15-SP4",
-                description="🤖: sync package with openSUSE.org:devel:BCI:SLE-15-SP4 from OBS",
-                source_revision="4",
-                destination_project="SUSE:SLE-15-SP4:Update:BCI",
-            ),
-        ),
-        (
-            """310990  State:review(approved) By:dirkmueller  When:2023-10-20T13:11:58
-        Created by: dirkmueller
-        submit:          home:dirkmueller:branches:SUSE:SLE-15-SP5:Update:BCI/rmt-helm@5 -> SUSE:SLE-15-SP5:Update:BCI
-        Review by Group      is accepted:  legal-auto(licensedigger)                         
-        Review by Group      is accepted:  autobuild-team(darix)                             
-        Review by Group      is new:       sle-release-managers""",
-            SubmitRequest(
-                id=310990,
-                state=RequestState.REVIEW,
-                source_package="rmt-helm",
-                source_project="home:dirkmueller:branches:SUSE:SLE-15-SP5:Update:BCI",
-                description=None,
-                source_revision="5",
-                destination_project="SUSE:SLE-15-SP5:Update:BCI",
-            ),
-        ),
-    ],
-)
-def test_from_osc_stdout(stdout: str, submit_request: SubmitRequest):
-    assert submit_request == SubmitRequest.from_osc_output(stdout)
+"""
+    assert SubmitRequest.from_osc_output(stdout) is SubmitRequest.from_osc_output(
+        stdout
+    )
+
+
+def test_from_osc_stdout_invalid_state():
+    with pytest.raises(ValueError, match="'foobar' is not a valid RequestState"):
+        SubmitRequest.from_osc_output(
+            """972062  State:foobar   By:dirkmueller  When:2022-04-22T09:00:20
+        submit:          home:dancermak:auto_update:sp4/ruby-2.5-image@2 -> devel:BCI:SLE-15-SP4
+        Descr: remove org.opencontainers.image.revision label
+"""
+        )
+
+
+def test_from_osc_stdout_trailing_token():
+    with pytest.raises(AssertionError, match="malformed request output"):
+        SubmitRequest.from_osc_output(
+            """972062  State:new   By:dirkmueller  When:2022-04-22T09:00:20
+        submit:          home:dancermak:auto_update:sp4/ruby-2.5-image@2 -> devel:BCI:SLE-15-SP4 foo
+        Descr: remove org.opencontainers.image.revision label
+"""
+        )
 
 
 @pytest.mark.parametrize(
     "stdout,requests",
     [
         ("""No results for package SUSE:SLE-15-SP4:Update:BCI/init-image""", []),
+        ("No results for package SUSE:SLE-15-SP4:Update:BCI/init-image\n", []),
+        ("  \nNo results for package SUSE:SLE-15-SP4:Update:BCI/init-image", []),
+        ("", []),
+        ("\n\n", []),
         (
             """259543  State:superseded By:dancermak    When:2021-12-13T08:01:09
         submit:          home:dancermak:branches:SUSE:SLE-15-SP4:Update:BCI/ruby-2.5-image@2 -> SUSE:SLE-15-SP4:Update:BCI
@@ -243,3 +165,88 @@ def test_from_osc_stdout(stdout: str, submit_request: SubmitRequest):
 )
 def test_request_list_from_osc_output(stdout: str, requests: List[SubmitRequest]):
     assert _submit_requests_from_osc(stdout) == requests
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_fetch_submitrequests_many(mocker: MockerFixture):
+    async def fake_run_cmd(cmd: List[str], **kwargs) -> CommandResult:
+        if cmd[-1] == "devel:BCI:SLE-15-SP4/ruby-2.5-image":
+            return CommandResult(
+                0,
+                """969741  State:new    By:dancermak    When:2022-04-13T08:45:53
+        submit:          home:dancermak:auto_update:sp4/ruby-2.5-image@2 -> devel:BCI:SLE-15-SP4
+        Descr: Update to the latest generator version
+""",
+                "",
+            )
+        return CommandResult(0, f"No results for package {cmd[-1]}", "")
+
+    mocker.patch("obs_package_update.submitrequest.run_cmd", side_effect=fake_run_cmd)
+
+    assert await fetch_submitrequests_many(
+        [
+            Package("devel:BCI:SLE-15-SP4", "init-image"),
+            Package("devel:BCI:SLE-15-SP4", "ruby-2.5-image"),
+        ]
+    ) == [
+        [],
+        [
+            SubmitRequest(
+                id=969741,
+                state=RequestState.NEW,
+                source_project="home:dancermak:auto_update:sp4",
+                source_package="ruby-2.5-image",
+                source_revision="2",
+                destination_project="devel:BCI:SLE-15-SP4",
+                description="Update to the latest generator version",
+            )
+        ],
+    ]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.parametrize(
+    "submit_request_states,states",
+    [
+        (None, "new,review,declined"),
+        ([], "new,review,declined"),
+        ([RequestState.ACCEPTED], "accepted"),
+        ([RequestState.REVOKED, RequestState.SUPERSEDED], "revoked,superseded"),
+        ("all", "all"),
+    ],
+)
+async def test_fetch_submitrequests_states(
+    mocker: MockerFixture, submit_request_states, states: str
+):
+    run_cmd = mocker.patch(
+        "obs_package_update.submitrequest.run_cmd",
+        return_value=CommandResult(0, "No results for package foo/bar", ""),
+    )
+
+    assert (
+        await fetch_submitrequests(
+            "foo", "bar", submit_request_states=submit_request_states
+        )
+        == []
+    )
+    run_cmd.assert_called_once_with(
+        ["osc", "request", "list", "-s", states, "-t", "submit", "foo/bar"],
+        logger=None,
+    )
+
+
+def test_request_list_from_osc_output_interned():
+    requests = _submit_requests_from_osc(
+        """260266  State:accepted   By:aherzig      When:2021-12-14T17:08:39
+        submit:          home:dancermak:branches:SUSE:SLE-15-SP4:Update:BCI/ruby-2.5-image@4 -> SUSE:SLE-15-SP4:Update:BCI
+        Descr: Submission of the BCI image from SP3
+
+261877  State:accepted   By:fcrozat      When:2022-01-13T15:34:19
+        submit:          home:dancermak:branches:SUSE:SLE-15-SP4:Update:BCI/ruby-2.5-image@2 -> SUSE:SLE-15-SP4:Update:BCI
+        Descr: Cleanup /var/log
+"""
+    )
+
+    assert requests[0].source_project is requests[1].source_project
+    assert requests[0].source_package is requests[1].source_package
+    assert requests[0].destination_project is requests[1].destination_project
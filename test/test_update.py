@@ -0,0 +1,99 @@
+from typing import List, Optional
+import pytest
+from pytest_mock import MockerFixture
+from obs_package_update import Package, Updater
+from obs_package_update.util import CommandResult, RunCommand
+
+BRANCH_STDOUT = """A working copy of the branched package can be checked out with:
+
+osc co home:foo:branches:prj/pkg
+"""
+
+
+class FileWritingUpdater(Updater):
+    async def add_files(self, destination: str) -> List[str]:
+        return ["pkg.spec", "pkg-1.0.tar.gz", "_service"]
+
+
+def mock_osc(mocker: MockerFixture, st_stdout: bytes = b"M    pkg.spec\n"):
+    async def run(self: RunCommand, cmd: List[str], *, decode: bool = True):
+        if "branch" in cmd:
+            return CommandResult(0, BRANCH_STDOUT, "")
+        if "st" in cmd:
+            return CommandResult(0, st_stdout, b"")
+        return CommandResult(0, "" if decode else b"", "" if decode else b"")
+
+    return mocker.patch.object(RunCommand, "__call__", autospec=True, side_effect=run)
+
+
+def osc_calls(run) -> List[List[str]]:
+    return [call.args[1] for call in run.call_args_list]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.parametrize(
+    "target_project,branch_cmd",
+    [
+        (None, ["branch", "prj", "pkg"]),
+        ("home:foo:staging", ["branch", "prj", "pkg", "home:foo:staging"]),
+    ],
+)
+async def test_update_package(
+    mocker: MockerFixture, target_project: Optional[str], branch_cmd: List[str]
+):
+    run = mock_osc(mocker)
+
+    await FileWritingUpdater(osc_cli="osc -A https://api.example.org").update_package(
+        Package("prj", "pkg"), "Update to 1.0", target_project=target_project
+    )
+
+    osc = ["osc", "-A", "https://api.example.org"]
+    calls = osc_calls(run)
+    assert calls[0] == [*osc, *branch_cmd]
+    # the last argument is the temporary checkout directory
+    assert calls[1][:-1] == [*osc, "co", "home:foo:branches:prj/pkg", "-o"]
+    assert calls[2:] == [
+        [*osc, "add", "pkg.spec", "pkg-1.0.tar.gz", "_service"],
+        [*osc, "st"],
+        [*osc, "vc", "-m", "Update to 1.0"],
+        [*osc, "ci", "-m", "Update to 1.0"],
+        [*osc, "service", "wait", "home:foo:branches:prj", "pkg"],
+        [*osc, "sr", "--cleanup", "-m", "Update to 1.0"],
+    ]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_update_package_no_change(mocker: MockerFixture):
+    run = mock_osc(mocker, st_stdout=b"")
+
+    await FileWritingUpdater().update_package(Package("prj", "pkg"), "Update")
+
+    osc = ["osc", "-A", "https://api.opensuse.org"]
+    assert osc_calls(run)[-2:] == [
+        [*osc, "st"],
+        [
+            *osc,
+            "rdelete",
+            "home:foo:branches:prj/pkg",
+            "-m",
+            "cleanup as nothing changed",
+        ],
+    ]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_update_package_osc_cli_changed(mocker: MockerFixture):
+    run = mock_osc(mocker)
+
+    updater = FileWritingUpdater()
+    updater.osc_cli = "osc -A https://api.example.org"
+    await updater.update_package(Package("prj", "pkg"), "Update")
+
+    assert osc_calls(run)[0] == [
+        "osc",
+        "-A",
+        "https://api.example.org",
+        "branch",
+        "prj",
+        "pkg",
+    ]
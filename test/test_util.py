@@ -1,48 +1,129 @@
 import asyncio
+import copy
 import pathlib
-from dataclasses import dataclass
+import pickle
+import time
 from datetime import timedelta
 from logging import Logger
-from typing import Generic, Optional, TypeVar
+from typing import Any, Callable, Coroutine, List, Optional, Tuple, TypeVar
 from pytest_mock import MockerFixture
 import pytest
 from obs_package_update import run_cmd
 from obs_package_update.util import (
     CommandError,
     CommandResult,
+    RETRY_DELAYS,
     RunCommand,
     retry_async_run_cmd,
 )
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="session")
 async def test_basic_run():
     res = await run_cmd("echo 'foobar'")
     assert "foobar" in res.stdout
 
 
-@pytest.mark.asyncio
-async def test_timeout():
-    with pytest.raises(asyncio.exceptions.TimeoutError):
-        await run_cmd("sleep 2", timeout=timedelta(seconds=1))
+@pytest.mark.asyncio(loop_scope="session")
+async def test_argv_run():
+    res = await run_cmd(["echo", "$FOOBAR", "foo bar"], env={"FOOBAR": "value"})
+    assert res.stdout == "$FOOBAR foo bar\n"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_argv_raise_on_err_exc():
+    with pytest.raises(CommandError) as cmd_err_ctx:
+        await run_cmd(["sh", "-c", "exit 3"])
+
+    assert "Command sh -c 'exit 3' failed (exit code 3)" in str(cmd_err_ctx.value)
+
+
+@pytest.mark.asyncio(loop_scope="function")
+async def test_timeout(tmp_path):
+    pid_file = tmp_path / "pid"
+    # each probe waits for its timeout to expire => run them concurrently
+    start = time.monotonic()
+    results = await asyncio.gather(
+        run_cmd("sleep 2", timeout=timedelta(seconds=1)),
+        run_cmd("sleep 2", timeout=1),
+        run_cmd(["sleep", "30"], timeout=1),
+        # the shell forks sleep, which must be killed as well
+        run_cmd("sleep 30; true", timeout=1, new_session=True),
+        # the shell exits immediately, but the backgrounded sleep keeps stdout open
+        run_cmd("sleep 30 & echo foo", timeout=1, new_session=True),
+        # sleep leaves the process group, which is gone by the time we kill it
+        run_cmd(f"setsid sleep 2 & echo $! > {pid_file}", timeout=1, new_session=True),
+        return_exceptions=True,
+    )
+
+    for res in results:
+        assert isinstance(res, asyncio.exceptions.TimeoutError)
+    assert time.monotonic() - start < 10
+
+    # the sleep outside of our session cannot be killed, wait for it to exit
+    # so that its pipes are closed before the event loop goes away
+    stat_file = pathlib.Path(f"/proc/{pid_file.read_text().strip()}/stat")
+    try:
+        while stat_file.read_text().split()[2] != "Z":
+            await asyncio.sleep(0.05)
+    except FileNotFoundError:
+        pass
+    await asyncio.sleep(0.1)
+
+
+@pytest.mark.asyncio(loop_scope="function")
+async def test_cancel_kills_process_group(tmp_path):
+    pid_file = tmp_path / "pid"
+    task = asyncio.ensure_future(
+        run_cmd(f"sleep 30 & echo $! > {pid_file}; wait", new_session=True)
+    )
+    while not pid_file.exists() or not pid_file.read_text().strip():
+        await asyncio.sleep(0.05)
+    pid = int(pid_file.read_text())
+
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    # the orphaned sleep may linger as a zombie until it is reaped
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            assert stat.read().split()[2] == "Z"
+    except FileNotFoundError:
+        pass
+
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_large_output():
+    # more than the pipe buffer size, must not block the child
+    res = await run_cmd("head -c 1000000 /dev/zero | tr '\\0' 'a'", timeout=10)
+    assert res.stdout == "a" * 1000000
 
-@pytest.mark.asyncio
-async def test_timeout_seconds():
-    with pytest.raises(asyncio.exceptions.TimeoutError):
-        await run_cmd("sleep 2", timeout=1)
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_no_decode():
+    res = await run_cmd("printf 'foo\\377'", decode=False)
+    assert res.stdout == b"foo\xff"
+    assert res.stderr == b""
 
-@pytest.mark.asyncio
+    with pytest.raises(CommandError) as cmd_err_ctx:
+        await RunCommand()("printf 'foo'; false", decode=False)
+
+    assert cmd_err_ctx.value.command_result.stdout == b"foo"
+    assert "with stdout: 'foo'" in str(cmd_err_ctx.value)
+
+
+@pytest.mark.asyncio(loop_scope="session")
 async def test_env():
-    res = await run_cmd("echo $FOOBAR")
-    assert "" == res.stdout.strip()
+    inherited, explicit = await asyncio.gather(
+        run_cmd("echo $FOOBAR"), run_cmd("echo $FOOBAR", env={"FOOBAR": "value"})
+    )
 
-    res = await run_cmd("echo $FOOBAR", env={"FOOBAR": "value"})
-    assert "value" == res.stdout.strip()
+    assert "" == inherited.stdout.strip()
+    assert "value" == explicit.stdout.strip()
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="session")
 async def test_raise_on_err_exc():
     with pytest.raises(RuntimeError) as runtime_err_ctx:
         await run_cmd("sed '|afs|d'", raise_on_error=True)
@@ -62,14 +143,14 @@ async def test_raise_on_err_exc():
     )
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="session")
 async def test_raise_on_err():
     res = await run_cmd("false", raise_on_error=False)
 
     assert res.exit_code == 1
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="session")
 async def test_iterator_CommandResult():
     exit_code = 42
     stderr = "errorrrrr!"
@@ -81,7 +162,13 @@ async def test_iterator_CommandResult():
     assert err == stderr
 
 
-@pytest.mark.asyncio
+def test_CommandResult_pickle():
+    res = CommandResult(exit_code=1, stdout="foo", stderr="bar")
+    assert pickle.loads(pickle.dumps(res)) == res
+    assert copy.copy(res) == res
+
+
+@pytest.mark.asyncio(loop_scope="session")
 async def test_RunCommand_success():
     caller = RunCommand()
     res = await caller("true")
@@ -90,21 +177,34 @@ async def test_RunCommand_success():
     assert res.stderr == ""
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="session")
 async def test_RunCommand_fail():
     with pytest.raises(RuntimeError) as runtime_err_ctx:
         await RunCommand()("false")
 
     assert "Command false failed (exit code 1) with stdout: '', stderr: ''" in str(
-        runtime_err_ctx
+        runtime_err_ctx.value
     )
+    assert isinstance(runtime_err_ctx.value, CommandError)
+    assert runtime_err_ctx.value.command_result.exit_code == 1
+
 
+@pytest.fixture(scope="session")
+def cwd_probe(tmp_path_factory: pytest.TempPathFactory) -> Tuple[pathlib.Path, str]:
+    """Read-only directory with a single file for the cwd tests, it is created
+    once per test session.
 
-@pytest.mark.asyncio
-async def test_RunCommand_cwd(tmp_path: pathlib.Path):
+    """
+    tmp_path = tmp_path_factory.mktemp("runcmd")
     fname = "test-random-string-IwJLivCaJp"
     with open(tmp_path / fname, "w") as tmp:
         tmp.write("1")
+    return tmp_path, fname
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_RunCommand_cwd(cwd_probe: Tuple[pathlib.Path, str]):
+    tmp_path, fname = cwd_probe
 
     cmd = f"cat {fname}"
     with pytest.raises(RuntimeError):
@@ -115,7 +215,7 @@ async def test_RunCommand_cwd(tmp_path: pathlib.Path):
     assert (await RunCommand(cwd="/")(cmd, cwd=str(tmp_path))).stdout.strip() == "1"
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="session")
 async def test_RunCommand_raise_on_error():
     for fut in (
         RunCommand()("false"),
@@ -137,7 +237,7 @@ async def test_RunCommand_raise_on_error():
     assert (await RunCommand()("false", raise_on_error=False)).exit_code == 1
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="session")
 async def test_RunCommand_env():
     _cmd = "echo $FOOBAR"
     _env = {"FOOBAR": "test"}
@@ -148,50 +248,55 @@ async def test_RunCommand_env():
         await RunCommand(env={"FOOBAR": "not TEST!"})(_cmd, env=_env)
     ).stdout.strip() == "test"
     assert (await RunCommand()(_cmd)).stdout.strip() == ""
+    # an empty environment replaces the one of the RunCommand as well
+    assert (await RunCommand(env=_env)(_cmd, env={})).stdout.strip() == ""
 
 
 T = TypeVar("T")
 
 
-@dataclass
-class FailNCalls(Generic[T]):
-    calls_to_fail: int
+def make_fail_n_calls(
+    calls_to_fail: int, return_value: Optional[T] = None
+) -> Tuple[List[int], Callable[[], Coroutine[Any, Any, Optional[T]]]]:
+    """Create a coroutine function that raises a :py:class:`RuntimeError` on
+    its first ``calls_to_fail`` calls and returns ``return_value`` afterwards.
 
-    return_value: Optional[T] = None
-    _call_count: int = 0
+    Returns:
+        A list whose only element is the number of calls so far and the
+        coroutine function.
+    """
+    call_count = [0]
 
-    async def __call__(self) -> Optional[T]:
-        self._call_count += 1
-        if self._call_count <= self.calls_to_fail:
+    async def fail_n_calls() -> Optional[T]:
+        call_count[0] += 1
+        if call_count[0] <= calls_to_fail:
             raise RuntimeError("🤮")
 
-        return self.return_value
+        return return_value
 
-    @property
-    def call_count(self) -> int:
-        return self._call_count
+    return call_count, fail_n_calls
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="session")
 @pytest.mark.parametrize("failures", range(5))
 async def test_retry_async_cmd(failures: int):
-    bump_call_count: FailNCalls = FailNCalls(failures)
+    call_count, bump_call_count = make_fail_n_calls(failures)
 
-    await retry_async_run_cmd(bump_call_count)
+    await retry_async_run_cmd(bump_call_count, delays=())
 
-    assert bump_call_count.call_count == failures + 1
+    assert call_count[0] == failures + 1
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="session")
 async def test_retry_async_cmd_return():
-    test_coro = FailNCalls(2, return_value=42)
+    _, test_coro = make_fail_n_calls(2, return_value=42)
 
-    assert await retry_async_run_cmd(test_coro) == 42
+    assert await retry_async_run_cmd(test_coro, delays=()) == 42
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="session")
 async def test_retry_async_cmd_logger(mocker: MockerFixture):
-    fail_once: FailNCalls = FailNCalls(1)
+    _, fail_once = make_fail_n_calls(1)
 
     class StubLogger(Logger):
         def debug(self, *args, **kwargs) -> None:
@@ -200,15 +305,42 @@ async def test_retry_async_cmd_logger(mocker: MockerFixture):
     spy = mocker.spy(StubLogger, "debug")
     logger = StubLogger(name=__name__)
 
-    await retry_async_run_cmd(fail_once, logger=logger)
+    await retry_async_run_cmd(fail_once, logger=logger, delays=())
     spy.assert_called_once()
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="session")
 async def test_retry_async_cmd_fail():
-    fail_twice = FailNCalls(2)
+    _, fail_twice = make_fail_n_calls(2)
 
     with pytest.raises(RuntimeError) as runtime_err_ctx:
         await retry_async_run_cmd(fail_twice, retries=1)
 
-    assert "🤮" in str(runtime_err_ctx)
+    assert str(runtime_err_ctx.value) == "🤮"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_retry_async_cmd_no_retries():
+    with pytest.raises(ValueError):
+        await retry_async_run_cmd(make_fail_n_calls(0)[1], retries=0)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.parametrize(
+    "delays,expected_sleeps",
+    [
+        (RETRY_DELAYS, [0.1, 0.2, 0.4, 0.8]),
+        ((1, 2), [1, 2, 2, 2]),
+        ((), []),
+    ],
+)
+async def test_retry_async_cmd_delays(
+    mocker: MockerFixture, delays: Tuple[float, ...], expected_sleeps: List[float]
+):
+    sleep = mocker.patch("obs_package_update.util.asyncio.sleep")
+
+    await retry_async_run_cmd(make_fail_n_calls(4)[1], delays=delays)
+
+    assert [call.args[0] for call in sleep.call_args_list] == pytest.approx(
+        expected_sleeps
+    )